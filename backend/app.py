@@ -2,22 +2,48 @@ import os
 import re
 import tempfile
 import json
+import secrets
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from typing import Dict, List, Any
-import requests
-from fastapi import FastAPI, UploadFile, File
-from fastapi.responses import FileResponse, JSONResponse, Response
+import anyio
+import httpx
+import orjson
+from fastapi import FastAPI, UploadFile, File, Header
+from fastapi.responses import FileResponse, ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.background import BackgroundTask
 
 from models import BuildConfig, PreviewResponse, GoogleFetchRequest
-from processors import load_spreadsheet, guess_columns, apply_mapping, build_sessions, build_generic_items
+from processors import load_spreadsheet, guess_columns, apply_mapping, build_sessions, build_generic_items, sheet_fingerprint
 from validators import validate_sessions, validate_people, validate_sponsors
+from sessions import make_session_store
 
 APP_DIR = os.path.dirname(os.path.abspath(__file__))
 ROOT_DIR = os.path.dirname(APP_DIR)
 FRONT_DIR = os.path.join(ROOT_DIR, "frontend")
+IO_CHUNK_SIZE = 64 * 1024
+DERIVED_CACHE_SIZE = 64
 
-app = FastAPI(title="Interactive Program Builder v2.2.1")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled client for Google Sheets downloads and the program proxy, so
+    # repeat fetches reuse keep-alive connections instead of a new TLS handshake.
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        follow_redirects=True,
+        timeout=45,
+        limits=httpx.Limits(max_keepalive_connections=32),
+    )
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
+        await SESSIONS.close()
+
+app = FastAPI(title="Interactive Program Builder v2.2.1", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,139 +52,209 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-_STATE: Dict[str, Any] = {"path": None, "sheets": {}}
+# Mapped frames, built rows and sponsor indexes, keyed on content (sheet
+# fingerprint, mapping, options…) so repeat previews skip the rebuild.
+_DERIVED: "OrderedDict[tuple, Any]" = OrderedDict()
+_DERIVED_LOCK = threading.Lock()
+
+def _memoized(key: tuple, compute):
+    with _DERIVED_LOCK:
+        if key in _DERIVED:
+            _DERIVED.move_to_end(key)
+            return _DERIVED[key]
+    value = compute()
+    with _DERIVED_LOCK:
+        _DERIVED[key] = value
+        while len(_DERIVED) > DERIVED_CACHE_SIZE:
+            _DERIVED.popitem(last=False)
+    return value
+
+def _forget_sheets(hashes: set):
+    # Sponsor indexes aren't tied to one sheet; they're cheap to rebuild, so
+    # drop them along with the session's own entries.
+    with _DERIVED_LOCK:
+        for key in [k for k in _DERIVED if k[0] in hashes or k[0] == "sponsor_index"]:
+            del _DERIVED[key]
+
+# Uploaded workbooks, keyed by the session id handed out on upload and sent
+# back by the client as X-Session. Set REDIS_URL to share them across workers.
+SESSIONS = make_session_store(on_drop=_forget_sheets)
+
+def _load_workbook(path: str) -> Dict[str, Dict[str, Any]]:
+    return {
+        name: {"df": df, "columns": list(df.columns), "guess": guess_columns(df), "hash": sheet_fingerprint(df)}
+        for name, df in load_spreadsheet(path).items()
+    }
+
+def _sheet_info(session: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"name": name, "columns": sh["columns"], "guess": sh["guess"]} for name, sh in session["sheets"].items()]
+
+async def _register_workbook(path: str, session_id: str | None) -> Dict[str, Any]:
+    # Only reuse ids we handed out ourselves; anything else gets a fresh one.
+    sid = session_id if session_id and await SESSIONS.load(session_id) else secrets.token_urlsafe(16)
+    # The parsed sheets live in the session store, so the temp workbook is
+    # only needed while it's being read.
+    try:
+        session = {"sheets": await anyio.to_thread.run_sync(_load_workbook, path)}
+    finally:
+        os.remove(path)
+    await SESSIONS.save(sid, session)
+    return {"sheets": _sheet_info(session), "session_id": sid}
 
 def _parse_sheet_id(url: str) -> str | None:
     m = re.search(r"/spreadsheets/d/([a-zA-Z0-9-_]+)", url)
     return m.group(1) if m else None
 
-def _download_gsheet_xlsx(sheet_id: str) -> str:
+async def _download_gsheet_xlsx(sheet_id: str) -> str:
     url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=xlsx"
-    resp = requests.get(url, timeout=45)
-    if resp.status_code == 403:
-        raise PermissionError("Google Sheets returned 403. Share as 'Anyone with the link (Viewer)' or 'Publish to the web'.")
-    resp.raise_for_status()
-    fd, path = tempfile.mkstemp(prefix="_gsheet_", suffix=".xlsx")
-    with os.fdopen(fd, "wb") as f:
-        f.write(resp.content)
+    async with app.state.http.stream("GET", url) as resp:
+        if resp.status_code == 403:
+            raise PermissionError("Google Sheets returned 403. Share as 'Anyone with the link (Viewer)' or 'Publish to the web'.")
+        resp.raise_for_status()
+        fd, path = tempfile.mkstemp(prefix="_gsheet_", suffix=".xlsx")
+        os.close(fd)
+        try:
+            async with await anyio.open_file(path, "wb") as f:
+                async for chunk in resp.aiter_bytes(IO_CHUNK_SIZE):
+                    await f.write(chunk)
+        except BaseException:
+            os.remove(path)
+            raise
     return path
 
 @app.post("/api/upload")
-async def upload(file: UploadFile = File(...)):
+async def upload(file: UploadFile = File(...), x_session: str | None = Header(default=None)):
     suffix = os.path.splitext(file.filename)[1] or ".xlsx"
-    with tempfile.NamedTemporaryFile(delete=False, prefix="_uploaded_", suffix=suffix) as tmp:
-        tmp.write(await file.read())
-        dest = tmp.name
-    _STATE["path"] = dest
-    _STATE["sheets"].clear()
-    dfs = load_spreadsheet(dest)
-    info = []
-    for name, df in dfs.items():
-        _STATE["sheets"][name] = df
-        cols = list(df.columns)
-        info.append({"name": name, "columns": cols, "guess": guess_columns(df)})
-    return {"sheets": info}
+    fd, dest = tempfile.mkstemp(prefix="_uploaded_", suffix=suffix)
+    os.close(fd)
+    try:
+        async with await anyio.open_file(dest, "wb") as out:
+            while chunk := await file.read(IO_CHUNK_SIZE):
+                await out.write(chunk)
+    except BaseException:
+        os.remove(dest)
+        raise
+    return await _register_workbook(dest, x_session)
 
 @app.post("/api/fetch_google")
-async def fetch_google(req: GoogleFetchRequest):
+async def fetch_google(req: GoogleFetchRequest, x_session: str | None = Header(default=None)):
     sheet_id = _parse_sheet_id(req.url)
     if not sheet_id:
-        return JSONResponse({"error": "Could not extract Google Sheet ID from URL."}, status_code=400)
+        return ORJSONResponse({"error": "Could not extract Google Sheet ID from URL."}, status_code=400)
     try:
-        xlsx_path = _download_gsheet_xlsx(sheet_id)
+        xlsx_path = await _download_gsheet_xlsx(sheet_id)
     except PermissionError as e:
-        return JSONResponse({"error": str(e)}, status_code=403)
+        return ORJSONResponse({"error": str(e)}, status_code=403)
     except Exception as e:
-        return JSONResponse({"error": f"Failed to download spreadsheet: {e}"}, status_code=400)
-    _STATE["path"] = xlsx_path
-    _STATE["sheets"].clear()
-    dfs = load_spreadsheet(xlsx_path)
-    info = []
-    for name, df in dfs.items():
-        _STATE["sheets"][name] = df
-        cols = list(df.columns)
-        info.append({"name": name, "columns": cols, "guess": guess_columns(df)})
-    return {"sheets": info, "sheet_id": sheet_id}
+        return ORJSONResponse({"error": f"Failed to download spreadsheet: {e}"}, status_code=400)
+    return {**await _register_workbook(xlsx_path, x_session), "sheet_id": sheet_id}
 
 @app.get("/api/sheets")
-def list_sheets():
-    if not _STATE["path"]:
+async def list_sheets(x_session: str | None = Header(default=None)):
+    session = await SESSIONS.load(x_session) if x_session else None
+    if not session:
         return {"sheets": []}
-    info = []
-    for name, df in _STATE["sheets"].items():
-        info.append({"name": name, "columns": list(df.columns), "guess": guess_columns(df)})
-    return {"sheets": info}
+    return {"sheets": _sheet_info(session)}
 
-def _build_sponsor_index(other_out: Dict[str, list]) -> dict | None:
+def _find_sponsor_list(other_out: Dict[str, list]) -> list | None:
     for key, arr in other_out.items():
         if not isinstance(arr, list) or not arr:
             continue
         first = arr[0]
         if isinstance(first, dict) and ("logo" in first or "logo_url" in first or "image" in first):
-            by_id = {}
-            by_name = {}
-            for sp in arr:
-                sid = str(sp.get("id") or sp.get("name") or "").strip().lower()
-                name = str(sp.get("name") or "").strip().lower()
-                logo = sp.get("logo") or sp.get("logo_url") or sp.get("image") or ""
-                if sid: by_id[sid] = logo
-                if name: by_name[name] = logo
-            return {"by_id": by_id, "by_name": by_name}
+            return arr
     return None
 
-def _enrich_sessions_with_sponsor_logos(program_out: Dict[str, list], other_out: Dict[str, list]):
-    sidx = _build_sponsor_index(other_out)
-    if not sidx:
+def _index_sponsors(arr: list) -> dict:
+    by_id = {}
+    by_name = {}
+    for sp in arr:
+        get = sp.get
+        name = str(n).strip().lower() if (n := get("name")) else ""
+        sid = str(i).strip().lower() if (i := get("id")) else name
+        logo = get("logo") or get("logo_url") or get("image") or ""
+        if sid: by_id[sid] = logo
+        if name: by_name[name] = logo
+    return {"by_id": by_id, "by_name": by_name}
+
+def _build_sponsor_index(other_out: Dict[str, list]) -> dict | None:
+    arr = _find_sponsor_list(other_out)
+    return _index_sponsors(arr) if arr is not None else None
+
+def _cached_sponsor_index(other_out: Dict[str, list]) -> dict | None:
+    arr = _find_sponsor_list(other_out)
+    if arr is None:
+        return None
+    key = tuple((sp.get("id"), sp.get("name"), sp.get("logo"), sp.get("logo_url"), sp.get("image")) for sp in arr)
+    return _memoized(("sponsor_index", key), lambda: _index_sponsors(arr))
+
+def _enrich_sessions_with_sponsor_logos(program_out: Dict[str, list], other_out: Dict[str, list], sidx: dict | None = None):
+    if sidx is None:
+        sidx = _build_sponsor_index(other_out)
+    if not sidx or not (sidx["by_id"] or sidx["by_name"]):
         return
+    by_id_get = sidx["by_id"].get
+    by_name_get = sidx["by_name"].get
     for day_key, sessions in program_out.items():
         for s in sessions:
-            if str(s.get("sponsor_logo","")).strip():
+            if (logo := s.get("sponsor_logo")) and str(logo).strip():
                 continue
-            sid = str(s.get("sponsor_id","")).strip().lower()
-            if sid and sid in sidx["by_id"]:
-                s["sponsor_logo"] = sidx["by_id"][sid]
+            if (sid := s.get("sponsor_id")) and (logo := by_id_get(str(sid).strip().lower())) is not None:
+                s["sponsor_logo"] = logo
                 continue
-            sname = (s.get("sponsor") or s.get("sponsored_by") or s.get("sponsor_name") or "").strip().lower()
-            if sname and sname in sidx["by_name"]:
-                s["sponsor_logo"] = sidx["by_name"][sname]
+            sname = s.get("sponsor") or s.get("sponsored_by") or s.get("sponsor_name")
+            if sname and (logo := by_name_get(sname.strip().lower())) is not None:
+                s["sponsor_logo"] = logo
 
-@app.post("/api/preview")
-async def preview(config: BuildConfig):
-    if not _STATE["path"]:
-        return JSONResponse({"error": "No file provided. Upload a file or fetch from Google Sheets."}, status_code=400)
+def _mapping_key(s) -> tuple:
+    return (tuple(s.mapping.items()), s.slug, s.id_strategy, s.uid_column)
+
+def _mapped_sheet(df, sheet_hash: str, mapping: Dict[str, str]):
+    return _memoized((sheet_hash, "mapped", tuple(mapping.items())), lambda: apply_mapping(df, mapping))
+
+def _built_sessions(mapped, sheet_hash: str, s) -> List[Dict[str, Any]]:
+    key = (sheet_hash, "sessions", _mapping_key(s), json.dumps(s.options, sort_keys=True, default=str))
+    sessions = _memoized(key, lambda: build_sessions(mapped, s.slug, s.mapping, s.options, s.id_strategy, s.uid_column))
+    # Enrichment fills sponsor_logo in place, so hand out copies of cached rows.
+    return [dict(row) for row in sessions]
+
+def _built_items(mapped, sheet_hash: str, s) -> List[Dict[str, Any]]:
+    keep_fields = [k for k, v in s.mapping.items() if v]
+    items = _memoized((sheet_hash, "items", _mapping_key(s)), lambda: build_generic_items(mapped, keep_fields, s.slug, s.id_strategy, s.uid_column))
+    return [dict(item) for item in items]
+
+def _preview_sync(config: BuildConfig, sheets: Dict[str, Dict[str, Any]]) -> PreviewResponse:
     program_out: Dict[str, List[Dict[str, Any]]] = {}
     other_out: Dict[str, List[Dict[str, Any]]] = {}
     warnings_all, errors_all = [], []
     for s in config.sheets:
-        df = _STATE["sheets"].get(s.name)
-        if df is None:
+        sheet = sheets.get(s.name)
+        if sheet is None:
             warnings_all.append(f"[config] Sheet '{s.name}' not found in workbook")
             continue
-        mapped = apply_mapping(df, s.mapping)
+        df, h = sheet["df"], sheet["hash"]
+        mapped = _mapped_sheet(df, h, s.mapping)
         if s.sheet_type == "program":
-            sessions = build_sessions(mapped, s.slug, s.mapping, s.options, s.id_strategy, s.uid_column)
+            sessions = _built_sessions(mapped, h, s)
             if len(df) > 0 and not sessions:
                 warnings_all.append(f"[{s.key}] No program rows produced — check mapping for time/title/speaker/…")
             program_out[s.key] = sessions
         elif s.sheet_type == "faculty":
-            keep_fields = [k for k, v in s.mapping.items() if v]
-            items = build_generic_items(mapped, keep_fields, s.slug, s.id_strategy, s.uid_column)
+            items = _built_items(mapped, h, s)
             if len(df) > 0 and not items:
                 warnings_all.append(f"[{s.key}] No faculty rows produced — check mapping (e.g., name, bio, photo).")
             other_out[s.key] = items
         elif s.sheet_type == "sponsors":
-            keep_fields = [k for k, v in s.mapping.items() if v]
-            items = build_generic_items(mapped, keep_fields, s.slug, s.id_strategy, s.uid_column)
+            items = _built_items(mapped, h, s)
             if len(df) > 0 and not items:
                 warnings_all.append(f"[{s.key}] No sponsor rows produced — check mapping (e.g., name, logo, url).")
             other_out[s.key] = items
         else:
-            keep_fields = [k for k, v in s.mapping.items() if v]
-            items = build_generic_items(mapped, keep_fields, s.slug, s.id_strategy, s.uid_column)
+            items = _built_items(mapped, h, s)
             if len(df) > 0 and not items:
                 warnings_all.append(f"[{s.key}] No rows produced for custom type — check mapping.")
             other_out[s.key] = items
-    _enrich_sessions_with_sponsor_logos(program_out, other_out)
+    _enrich_sessions_with_sponsor_logos(program_out, other_out, _cached_sponsor_index(other_out))
     w1, e1 = validate_sessions(program_out)
     warnings_all += w1; errors_all += e1
     for key, items in other_out.items():
@@ -172,42 +268,52 @@ async def preview(config: BuildConfig):
     data_out = {}; data_out.update(program_out); data_out.update(other_out)
     return PreviewResponse(data=data_out, warnings=warnings_all, errors=errors_all)
 
+async def _run_preview(config: BuildConfig, session_id: str | None) -> PreviewResponse | ORJSONResponse:
+    session = await SESSIONS.load(session_id) if session_id else None
+    if not session:
+        return ORJSONResponse({"error": "No file provided. Upload a file or fetch from Google Sheets."}, status_code=400)
+    # Snapshot the sheets so a concurrent upload/reset can't swap them mid-build.
+    return await anyio.to_thread.run_sync(_preview_sync, config, dict(session["sheets"]))
+
+@app.post("/api/preview")
+async def preview(config: BuildConfig, x_session: str | None = Header(default=None)):
+    return await _run_preview(config, x_session)
+
 @app.post("/api/build")
-async def build(config: BuildConfig):
-    prev = await preview(config)
-    if isinstance(prev, PreviewResponse):
-        content = prev.model_dump()
-    else:
+async def build(config: BuildConfig, x_session: str | None = Header(default=None)):
+    prev = await _run_preview(config, x_session)
+    if not isinstance(prev, PreviewResponse):
         return prev
-    if content["errors"]:
-        return JSONResponse({"errors": content["errors"], "warnings": content["warnings"]}, status_code=400)
-    out_path = os.path.join(tempfile.gettempdir(), "program.json")
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(content["data"], f, ensure_ascii=False, indent=2)
-    return FileResponse(out_path, media_type="application/json", filename="program.json")
+    if prev.errors:
+        return ORJSONResponse({"errors": prev.errors, "warnings": prev.warnings}, status_code=400)
+    # Encode straight from the model's data; no model_dump() copy in between.
+    out_bytes = orjson.dumps(prev.data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    fd, out_path = tempfile.mkstemp(prefix="_program_", suffix=".json")
+    os.close(fd)
+    async with await anyio.open_file(out_path, "wb") as f:
+        await f.write(out_bytes)
+    return FileResponse(out_path, media_type="application/json", filename="program.json", background=BackgroundTask(os.remove, out_path))
 
 @app.post("/api/reset")
-def reset():
-    path = _STATE.get("path")
-    if path and os.path.isfile(path):
-        try: os.remove(path)
-        except Exception: pass
-    _STATE["path"] = None
-    _STATE["sheets"] = {}
+async def reset(x_session: str | None = Header(default=None)):
+    if x_session:
+        await SESSIONS.delete(x_session)
     return {"status": "ok"}
 
 @app.get("/api/program")
-def proxy_program(src: str):
+async def proxy_program(src: str):
     try:
-        r = requests.get(src, timeout=30)
+        r = await app.state.http.get(src, timeout=30)
         r.raise_for_status()
         try:
-            data = r.json()
-        except ValueError:
-            data = json.loads(r.text)
-        return JSONResponse(content=data, headers={"Cache-Control": "no-store"})
+            data = orjson.loads(r.content)
+        except orjson.JSONDecodeError:
+            # orjson only takes strict UTF-8 JSON; fall back for a BOM, another
+            # charset or NaN/Infinity literals.
+            data = json.loads(r.text.lstrip("\ufeff"))
+        return ORJSONResponse(content=data, headers={"Cache-Control": "no-store"})
     except Exception as e:
-        return JSONResponse({"error": f"Fetch failed: {e}"}, status_code=502)
+        return ORJSONResponse({"error": f"Fetch failed: {e}"}, status_code=502)
 
 @app.get("/favicon.ico", include_in_schema=False)
 def favicon():
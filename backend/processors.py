@@ -1,22 +1,52 @@
+import hashlib
 import os
 import re
 from typing import Dict, List, Any, Tuple
+import numpy as np
 import pandas as pd
 
 DEFAULT_TARGET_FIELDS = [
     "time","title","speaker","chair","track","type","room","notes",
     "sponsor","sponsor_name","sponsored_by","sponsor_id","sponsor_logo"
 ]
+# A session row is kept only if at least one of these is non-blank.
+SESSION_CONTENT_FIELDS = ["time","title","speaker","chair","track","type","room","notes","sponsor","sponsor_logo"]
+
+# Mapped columns are Arrow-backed strings: one UTF-8 buffer per column instead
+# of a Python str object per cell, which matters for frames held in the cache.
+STRING_DTYPE = "string[pyarrow]"
+
+GUESS_CANDIDATES = {
+    "time":   ["hora","horario","time","schedule","start","start time","inicio"],
+    "title":  ["tema","título","titulo","title","subject","session","topic"],
+    "speaker":["ponente","speaker","presenter","author","speakers"],
+    "chair":  ["chair","moderator","chairperson","moderador"],
+    "track":  ["track","room","salon","salón","track/room"],
+    "type":   ["type","session type","category","categoría"],
+    "room":   ["room","salon","salón"],
+    "notes":  ["notes","note","remarks","comentarios","notas"],
+    "sponsor":       ["sponsor","patrocinador","sponsored by","sponsored_by","sponsor name","sponsor_name"],
+    "sponsor_name":  ["sponsor name","sponsor_name","patrocinador"],
+    "sponsored_by":  ["sponsored by","sponsored_by","patrocinador"],
+    "sponsor_id":    ["sponsor id","sponsor_id","id patrocinador","id sponsor","sponsor code","sponsor_code"],
+    "sponsor_logo":  ["sponsor logo","sponsor_logo","logo sponsor","logo patrocinador","logo"]
+}
+
+# Reverse lookup: lowercased header -> [(target, candidate rank)]. A header can
+# feed several targets (e.g. "room" is both track and room), so keep them all.
+CAND_TO_TARGETS: Dict[str, List[Tuple[str, int]]] = {}
+for _target, _cands in GUESS_CANDIDATES.items():
+    for _rank, _cand in enumerate(_cands):
+        CAND_TO_TARGETS.setdefault(_cand.lower(), []).append((_target, _rank))
+
+_TOKEN_RE = re.compile(r'(\d{1,2})\s*[:.\-h]\s*(\d{2})')
+_HHMM_RE = re.compile(r'^(\d{1,2}):(\d{2})$')
+_COMPACT_TIME_RE = re.compile(r'^(\d{1,2})(\d{2})$')
 
 def slugify(text: str) -> str:
     text = re.sub(r'[^a-zA-Z0-9]+', '-', str(text).strip().lower())
     return re.sub(r'-{2,}', '-', text).strip('-')
 
-def clean_str(x) -> str:
-    if pd.isna(x):
-        return ""
-    return str(x).strip()
-
 def normalize_time(raw) -> str:
     if raw is None:
         return ""
@@ -24,12 +54,15 @@ def normalize_time(raw) -> str:
     if not s or s.lower() == "nan":
         return ""
     s = s.replace("–", "-").replace("—", "-")
-    if re.match(r'^\d{1,2}:\d{2}$', s):
-        return re.sub(r'^(\d{1,2}):(\d{2})$', lambda m: f"{int(m.group(1)):02d}:{m.group(2)}", s)
-    token_re = re.compile(r'(\d{1,2})\s*[:.\-h]\s*(\d{2})')
-    tokens = token_re.findall(s)
+    # Already-normalized "HH:MM" is the common case; skip the regexes for it.
+    if len(s) == 5 and s[2] == ":" and s.isascii() and s[:2].isdigit() and s[3:].isdigit():
+        return s
+    m = _HHMM_RE.match(s)
+    if m:
+        return f"{int(m.group(1)):02d}:{m.group(2)}"
+    tokens = _TOKEN_RE.findall(s)
     if not tokens:
-        m = re.match(r'^(\d{1,2})(\d{2})$', s)
+        m = _COMPACT_TIME_RE.match(s)
         if m:
             return f"{int(m.group(1)):02d}:{m.group(2)}"
         return ""
@@ -40,41 +73,31 @@ def normalize_time(raw) -> str:
 
 def guess_columns(df: pd.DataFrame) -> Dict[str, str]:
     lower_cols = {str(c).strip().lower(): c for c in df.columns}
-    mapping = {}
-    candidates_map = {
-        "time":   ["hora","horario","time","schedule","start","start time","inicio"],
-        "title":  ["tema","título","titulo","title","subject","session","topic"],
-        "speaker":["ponente","speaker","presenter","author","speakers"],
-        "chair":  ["chair","moderator","chairperson","moderador"],
-        "track":  ["track","room","salon","salón","track/room"],
-        "type":   ["type","session type","category","categoría"],
-        "room":   ["room","salon","salón"],
-        "notes":  ["notes","note","remarks","comentarios","notas"],
-        "sponsor":       ["sponsor","patrocinador","sponsored by","sponsored_by","sponsor name","sponsor_name"],
-        "sponsor_name":  ["sponsor name","sponsor_name","patrocinador"],
-        "sponsored_by":  ["sponsored by","sponsored_by","patrocinador"],
-        "sponsor_id":    ["sponsor id","sponsor_id","id patrocinador","id sponsor","sponsor code","sponsor_code"],
-        "sponsor_logo":  ["sponsor logo","sponsor_logo","logo sponsor","logo patrocinador","logo"]
-    }
-    for target, candidates in candidates_map.items():
-        for cand in candidates:
-            key = cand.lower()
-            if key in lower_cols:
-                mapping[target] = lower_cols[key]
-                break
-    return mapping
+    best: Dict[str, Tuple[int, Any]] = {}
+    for key, col in lower_cols.items():
+        for target, rank in CAND_TO_TARGETS.get(key, ()):
+            if target not in best or rank < best[target][0]:
+                best[target] = (rank, col)
+    return {target: best[target][1] for target in GUESS_CANDIDATES if target in best}
 
 def load_spreadsheet(path: str) -> Dict[str, pd.DataFrame]:
     ext = os.path.splitext(path)[1].lower()
     if ext in (".xlsx",".xlsm",".xls"):
-        xl = pd.ExcelFile(path)
-        return {name: xl.parse(name) for name in xl.sheet_names}
+        # calamine reads cell values straight from the archive without building
+        # the openpyxl object model; dtype=str skips inference apply_mapping would undo.
+        return pd.read_excel(path, sheet_name=None, engine="calamine", dtype=str)
     elif ext == ".csv":
-        df = pd.read_csv(path)
+        df = pd.read_csv(path, dtype=str)
         return {os.path.basename(path): df}
     else:
         raise ValueError(f"Unsupported file type: {ext}")
 
+def sheet_fingerprint(df: pd.DataFrame) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr(list(df.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
 def resolve_column(df: pd.DataFrame, col_name):
     if col_name is None or col_name == "":
         return None
@@ -86,27 +109,27 @@ def resolve_column(df: pd.DataFrame, col_name):
     return None
 
 def apply_mapping(df: pd.DataFrame, mapping: Dict[str, str]) -> pd.DataFrame:
-    out = pd.DataFrame()
+    empty = pd.Series("", index=df.index, dtype=STRING_DTYPE)
+    cols = {}
     for target, col in mapping.items():
         resolved = resolve_column(df, col)
-        if resolved is not None:
-            out[target] = df[resolved].apply(clean_str)
-        else:
-            out[target] = ""
+        cols[target] = df[resolved].astype(STRING_DTYPE).str.strip().fillna("") if resolved is not None else empty
     for t in DEFAULT_TARGET_FIELDS:
-        if t not in out.columns:
-            out[t] = ""
-    return out
-
-def extract_chair_and_speaker(row: pd.Series, chair_from_speaker: bool, chair_prefix_regex: str) -> Tuple[str, str]:
-    speaker = row.get("speaker", "") or ""
-    chair = row.get("chair", "") or ""
-    if chair_from_speaker and speaker:
-        m = re.match(chair_prefix_regex, speaker, flags=re.I)
-        if m:
-            chair = re.sub(chair_prefix_regex, "", speaker, flags=re.I).strip()
-            speaker = ""
-    return chair, speaker
+        cols.setdefault(t, empty)
+    return pd.DataFrame(cols, index=df.index)
+
+def extract_chair_and_speaker(speakers: np.ndarray, chairs: np.ndarray, pat: re.Pattern | None) -> Tuple[np.ndarray, np.ndarray]:
+    if pat is None or len(speakers) == 0:
+        return chairs, speakers
+    s = pd.Series(speakers, dtype=object)
+    mask = (s.str.match(pat, na=False) & s.astype(bool)).to_numpy(dtype=bool)
+    if not mask.any():
+        return chairs, speakers
+    chairs = chairs.copy()
+    speakers = speakers.copy()
+    chairs[mask] = s[mask].str.replace(pat, "", regex=True).str.strip().to_numpy(dtype=object)
+    speakers[mask] = ""
+    return chairs, speakers
 
 def split_speakers(speaker: str, delim: str | None):
     if not speaker:
@@ -116,48 +139,47 @@ def split_speakers(speaker: str, delim: str | None):
         return parts
     return speaker
 
+def _column(df: pd.DataFrame, name: str) -> np.ndarray:
+    if name in df.columns:
+        return df[name].to_numpy(dtype=object)
+    return np.full(len(df), "", dtype=object)
+
+def _build_ids(df: pd.DataFrame, slug: str, id_strategy: str, uid_column: str | None) -> List[str]:
+    ids = [f"{slug}-{idx}" for idx in df.index]
+    if id_strategy == "uid-column" and uid_column and uid_column in df.columns:
+        for i, uid in enumerate(_column(df, uid_column)):
+            if uid:
+                ids[i] = slugify(uid)
+    return ids
+
+def _nonblank(values) -> np.ndarray:
+    return pd.Series(values, dtype=object).astype(str).str.strip().ne("").to_numpy(dtype=bool)
+
 def build_sessions(df: pd.DataFrame, slug: str, mapping: Dict[str, str], options: Dict[str, Any], id_strategy: str, uid_column: str | None) -> List[Dict[str, Any]]:
-    rows: List[Dict[str, Any]] = []
-    for idx, _ in df.iterrows():
-        r = df.loc[idx]
-        chair, speaker = extract_chair_and_speaker(r, options.get("chair_from_speaker", True), options.get("chair_prefix_regex", r"^\s*chair:?\s*"))
-        speaker_val = split_speakers(speaker, options.get("split_speakers_by"))
-        item = {
-            "time": normalize_time(r.get("time", "")),
-            "title": r.get("title", ""),
-            "speaker": speaker_val,
-            "chair": chair,
-            "track": r.get("track", ""),
-            "type": r.get("type", ""),
-            "room": r.get("room", ""),
-            "notes": r.get("notes", ""),
-            "sponsor": r.get("sponsor", "") or r.get("sponsor_name","") or r.get("sponsored_by",""),
-            "sponsor_name": r.get("sponsor_name", ""),
-            "sponsored_by": r.get("sponsored_by", ""),
-            "sponsor_id": r.get("sponsor_id", ""),
-            "sponsor_logo": r.get("sponsor_logo", ""),
-        }
-        if id_strategy == "uid-column" and uid_column and uid_column in df.columns and r.get(uid_column):
-            item_id = slugify(r.get(uid_column))
-        else:
-            item_id = f"{slug}-{idx}"
-        item["id"] = item_id
-        if any(str(item.get(k, "")).strip() for k in ["time","title","speaker","chair","track","type","room","notes","sponsor","sponsor_logo"]):
-            rows.append(item)
-    return rows
+    cols = {k: _column(df, k) for k in DEFAULT_TARGET_FIELDS}
+    pat = re.compile(options.get("chair_prefix_regex", r"^\s*chair:?\s*"), re.I) if options.get("chair_from_speaker", True) else None
+    chairs, speakers = extract_chair_and_speaker(cols["speaker"], cols["chair"], pat)
+    delim = options.get("split_speakers_by")
+    cols["time"] = [normalize_time(t) for t in cols["time"]]
+    cols["speaker"] = [split_speakers(sp, delim) for sp in speakers]
+    cols["chair"] = chairs
+    cols["sponsor"] = [a or b or c for a, b, c in zip(cols["sponsor"], cols["sponsor_name"], cols["sponsored_by"])]
+    keep = np.zeros(len(df), dtype=bool)
+    for k in SESSION_CONTENT_FIELDS:
+        keep |= _nonblank(cols[k])
+    ids = _build_ids(df, slug, id_strategy, uid_column)
+    return [
+        {**{k: cols[k][i] for k in DEFAULT_TARGET_FIELDS}, "id": ids[i]}
+        for i in np.flatnonzero(keep)
+    ]
 
 def build_generic_items(df: pd.DataFrame, keep_fields: List[str], slug: str, id_strategy: str, uid_column: str | None) -> List[Dict[str, Any]]:
-    rows: List[Dict[str, Any]] = []
-    for idx, _ in df.iterrows():
-        r = df.loc[idx]
-        item = {}
-        for k in keep_fields:
-            item[k] = r.get(k, "")
-        if id_strategy == "uid-column" and uid_column and uid_column in df.columns and r.get(uid_column):
-            item_id = slugify(r.get(uid_column))
-        else:
-            item_id = f"{slug}-{idx}"
-        item["id"] = item_id
-        if any(str(item.get(k, "")).strip() for k in keep_fields):
-            rows.append(item)
+    sub = df.reindex(columns=keep_fields, fill_value="")
+    keep = np.zeros(len(sub), dtype=bool)
+    for k in keep_fields:
+        keep |= _nonblank(sub[k].to_numpy(dtype=object))
+    ids = _build_ids(df, slug, id_strategy, uid_column)
+    rows = sub[keep].to_dict(orient="records")
+    for item, i in zip(rows, np.flatnonzero(keep)):
+        item["id"] = ids[i]
     return rows
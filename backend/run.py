@@ -0,0 +1,22 @@
+import os
+import sys
+import uvicorn
+
+def _workers() -> int:
+    if "WEB_CONCURRENCY" in os.environ:
+        return int(os.environ["WEB_CONCURRENCY"])
+    # Without REDIS_URL sessions live in process memory, so each worker would
+    # see a different upload; only fan out (2 * cpu + 1) when they're shared.
+    if os.environ.get("REDIS_URL"):
+        return (os.cpu_count() or 1) * 2 + 1
+    return 1
+
+if __name__ == "__main__":
+    uvicorn.run(
+        "app:app",
+        host=os.environ.get("HOST", "127.0.0.1"),
+        port=int(os.environ.get("PORT", 8000)),
+        loop="uvloop" if sys.platform != "win32" else "auto",
+        http="httptools",
+        workers=_workers(),
+    )
@@ -0,0 +1,173 @@
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+import anyio
+import pandas as pd
+
+SESSION_TTL = int(os.environ.get("SESSION_TTL", 3600))
+SESSION_LOCAL_CACHE = int(os.environ.get("SESSION_LOCAL_CACHE", 8))
+MAX_MEMORY_SESSIONS = int(os.environ.get("MAX_MEMORY_SESSIONS", 32))
+
+# Expiry clock, kept separate so tests can move it without touching the loop's.
+_now = time.monotonic
+
+# A session is {"sheets": {name: {"df", "columns", "guess", "hash"}}}.
+# on_drop, if given, is called with the sheet hashes of a session that is
+# replaced, deleted or evicted, so derived caches can let go of them.
+
+def _hashes(sheets: Dict[str, Dict[str, Any]]) -> set:
+    return {sh["hash"] for sh in sheets.values()}
+
+# Sessions kept in this process; fine for a single worker.
+class MemorySessionStore:
+    def __init__(self, ttl: int = SESSION_TTL, max_sessions: int = MAX_MEMORY_SESSIONS, on_drop: Callable[[set], None] | None = None):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.on_drop = on_drop
+        self._items: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def _dropped(self, hashes: set):
+        if self.on_drop and hashes:
+            self.on_drop(hashes)
+
+    def _evict(self, now: float):
+        while self._items:
+            sid, (expires, session) = next(iter(self._items.items()))
+            if expires > now and len(self._items) <= self.max_sessions:
+                break
+            del self._items[sid]
+            self._dropped(_hashes(session["sheets"]))
+
+    async def load(self, sid: str) -> Dict[str, Any] | None:
+        now = _now()
+        self._evict(now)
+        entry = self._items.get(sid)
+        if entry is None:
+            return None
+        self._items[sid] = (now + self.ttl, entry[1])
+        self._items.move_to_end(sid)
+        return entry[1]
+
+    async def save(self, sid: str, session: Dict[str, Any]):
+        old = self._items.pop(sid, None)
+        if old is not None:
+            self._dropped(_hashes(old[1]["sheets"]) - _hashes(session["sheets"]))
+        now = _now()
+        self._items[sid] = (now + self.ttl, session)
+        self._evict(now)
+
+    async def delete(self, sid: str):
+        entry = self._items.pop(sid, None)
+        if entry is not None:
+            self._dropped(_hashes(entry[1]["sheets"]))
+
+    async def close(self):
+        pass
+
+def _frame_to_ipc(df: pd.DataFrame) -> bytes:
+    import pyarrow as pa
+    # Arrow needs unique string column names; the real names live in the
+    # session metadata and are restored on load.
+    table = pa.Table.from_pandas(df.set_axis([str(i) for i in range(df.shape[1])], axis=1), preserve_index=True)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def _frame_from_ipc(data: bytes, columns: list) -> pd.DataFrame:
+    import pyarrow as pa
+    df = pa.ipc.open_file(io.BytesIO(data)).read_all().to_pandas()
+    return df.set_axis(columns, axis=1)
+
+# Sessions shared between workers through Redis, sheets stored as Arrow IPC.
+# Each worker keeps the last few deserialized sheets so the common single-user
+# loop doesn't round-trip through Arrow on every preview. Redis expires idle
+# sessions on its own, so on_drop only fires for replace and delete here.
+class RedisSessionStore:
+    def __init__(self, url: str, ttl: int = SESSION_TTL, local_cache: int = SESSION_LOCAL_CACHE, on_drop: Callable[[set], None] | None = None):
+        import redis.asyncio as redis
+        self.redis = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.local_cache = local_cache
+        self.on_drop = on_drop
+        self._frames: "OrderedDict[Tuple[str, str], pd.DataFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(sid: str) -> str:
+        return f"ipb:session:{sid}"
+
+    async def _old_hashes(self, sid: str) -> set:
+        raw_meta = await self.redis.hget(self._key(sid), "meta")
+        return {info["hash"] for info in json.loads(raw_meta)["sheets"].values()} if raw_meta else set()
+
+    def _forget(self, sid: str, hashes: set | None):
+        # hashes=None drops every cached sheet of the session.
+        with self._lock:
+            for cache_key in [k for k in self._frames if k[0] == sid and (hashes is None or k[1] in hashes)]:
+                del self._frames[cache_key]
+
+    def _remember(self, key: Tuple[str, str], df: pd.DataFrame):
+        with self._lock:
+            self._frames[key] = df
+            self._frames.move_to_end(key)
+            while len(self._frames) > self.local_cache:
+                self._frames.popitem(last=False)
+
+    async def load(self, sid: str) -> Dict[str, Any] | None:
+        key = self._key(sid)
+        raw_meta = await self.redis.hget(key, "meta")
+        if raw_meta is None:
+            return None
+        await self.redis.expire(key, self.ttl)
+        meta = json.loads(raw_meta)
+        sheets = {}
+        for name, info in meta["sheets"].items():
+            cache_key = (sid, info["hash"])
+            df = self._frames.get(cache_key)
+            if df is None:
+                data = await self.redis.hget(key, f"df:{name}")
+                if data is None:
+                    return None
+                df = await anyio.to_thread.run_sync(_frame_from_ipc, data, info["columns"])
+            self._remember(cache_key, df)
+            sheets[name] = {**info, "df": df}
+        return {"sheets": sheets}
+
+    async def save(self, sid: str, session: Dict[str, Any]):
+        sheets = session["sheets"]
+        meta = {"sheets": {name: {k: v for k, v in sh.items() if k != "df"} for name, sh in sheets.items()}}
+        fields = {"meta": json.dumps(meta, default=str)}
+        for name, sh in sheets.items():
+            fields[f"df:{name}"] = await anyio.to_thread.run_sync(_frame_to_ipc, sh["df"])
+            self._remember((sid, sh["hash"]), sh["df"])
+        old = await self._old_hashes(sid) - _hashes(sheets)
+        key = self._key(sid)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.hset(key, mapping=fields)
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+        self._forget(sid, old)
+        if self.on_drop and old:
+            self.on_drop(old)
+
+    async def delete(self, sid: str):
+        old = await self._old_hashes(sid)
+        await self.redis.delete(self._key(sid))
+        self._forget(sid, None)
+        if self.on_drop and old:
+            self.on_drop(old)
+
+    async def close(self):
+        await self.redis.aclose()
+
+def make_session_store(on_drop: Callable[[set], None] | None = None):
+    url = os.environ.get("REDIS_URL")
+    if url:
+        return RedisSessionStore(url, on_drop=on_drop)
+    return MemorySessionStore(on_drop=on_drop)
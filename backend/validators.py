@@ -46,7 +46,7 @@ def validate_sessions(data: Dict[str, List[Dict[str, Any]]]) -> Tuple[list, list
 
     return warnings, errors
 
-def validate_people(items: List[Dict[str, Any]], key_label="faculty") -> Tuple[list, list]:
+def _validate_named_items(items: List[Dict[str, Any]], key_label: str) -> Tuple[list, list]:
     warnings, errors = [], []
     seen_ids = set()
     for it in items:
@@ -62,18 +62,8 @@ def validate_people(items: List[Dict[str, Any]], key_label="faculty") -> Tuple[l
             errors.append(f"[{key_label}] Missing name for id={iid or '(no id)'}")
     return warnings, errors
 
+def validate_people(items: List[Dict[str, Any]], key_label="faculty") -> Tuple[list, list]:
+    return _validate_named_items(items, key_label)
+
 def validate_sponsors(items: List[Dict[str, Any]], key_label="sponsors") -> Tuple[list, list]:
-    warnings, errors = [], []
-    seen_ids = set()
-    for it in items:
-        iid = _text(it.get("id"))
-        name = _text(it.get("name"))
-        if not iid:
-            errors.append(f"[{key_label}] Missing id")
-        elif iid in seen_ids:
-            errors.append(f"[{key_label}] Duplicate id: {iid}")
-        else:
-            seen_ids.add(iid)
-        if not name:
-            errors.append(f"[{key_label}] Missing name for id={iid or '(no id)'}")
-    return warnings, errors
+    return _validate_named_items(items, key_label)
@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+from backend.app import _DERIVED, _built_items, _mapped_sheet, _preview_sync
+from backend.models import BuildConfig, SheetMapping
+from backend.processors import sheet_fingerprint
+
+def _sheet(df):
+    return {"df": df, "columns": list(df.columns), "guess": {}, "hash": sheet_fingerprint(df)}
+
+def _program_df():
+    return pd.DataFrame({"Hora": ["10:00", "11:00"], "Tema": ["Talk A", "Talk B"], "Ponente": ["Ann; Bob", "Cy"], "Sponsor": ["sp01", ""], "UID": ["A 1", "B 2"]})
+
+def _sheets(program=None):
+    return {
+        "oct_16": _sheet(program if program is not None else _program_df()),
+        "sponsors": _sheet(pd.DataFrame({"ID": ["sp01"], "Name": ["ACME"], "Logo": ["https://cdn/logo-acme.png"]})),
+    }
+
+def _program_cfg(**overrides):
+    cfg = {"name": "oct_16", "key": "oct_16", "slug": "o16", "mapping": {"time": "Hora", "title": "Tema", "speaker": "Ponente", "sponsor_id": "Sponsor", "uid": "UID"}}
+    cfg.update(overrides)
+    return cfg
+
+SPONSORS_CFG = {"name": "sponsors", "key": "sponsors", "slug": "sp", "sheet_type": "sponsors", "id_strategy": "uid-column", "uid_column": "id", "mapping": {"id": "ID", "name": "Name", "logo": "Logo"}}
+
+def _preview(sheets, *sheet_cfgs):
+    return _preview_sync(BuildConfig(sheets=list(sheet_cfgs)), sheets).data
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    _DERIVED.clear()
+    yield
+    _DERIVED.clear()
+
+def test_cache_returns_same_result_for_same_inputs():
+    sheets = _sheets()
+    first = _preview(sheets, _program_cfg())
+    assert _preview(sheets, _program_cfg()) == first
+
+def test_mapping_change_gives_new_result():
+    sheets = _sheets()
+    _preview(sheets, _program_cfg())
+    remapped = _preview(sheets, _program_cfg(mapping={"time": "Hora", "title": "Ponente"}))
+    assert [s["title"] for s in remapped["oct_16"]] == ["Ann; Bob", "Cy"]
+
+def test_options_change_gives_new_result():
+    sheets = _sheets()
+    assert _preview(sheets, _program_cfg())["oct_16"][0]["speaker"] == "Ann; Bob"
+    split = _preview(sheets, _program_cfg(options={"split_speakers_by": ";"}))
+    assert split["oct_16"][0]["speaker"] == ["Ann", "Bob"]
+
+def test_slug_and_id_strategy_change_give_new_ids():
+    sheets = _sheets()
+    assert [s["id"] for s in _preview(sheets, _program_cfg())["oct_16"]] == ["o16-0", "o16-1"]
+    assert [s["id"] for s in _preview(sheets, _program_cfg(slug="day1"))["oct_16"]] == ["day1-0", "day1-1"]
+    by_uid = _preview(sheets, _program_cfg(id_strategy="uid-column", uid_column="uid"))
+    assert [s["id"] for s in by_uid["oct_16"]] == ["a-1", "b-2"]
+
+def test_sheet_content_change_gives_new_result():
+    _preview(_sheets(), _program_cfg())
+    changed = _program_df()
+    changed.loc[0, "Tema"] = "Keynote"
+    assert _preview(_sheets(changed), _program_cfg())["oct_16"][0]["title"] == "Keynote"
+
+def test_enrichment_does_not_leak_into_cached_sessions():
+    sheets = _sheets()
+    enriched = _preview(sheets, _program_cfg(), SPONSORS_CFG)
+    assert enriched["oct_16"][0]["sponsor_logo"] == "https://cdn/logo-acme.png"
+    plain = _preview(sheets, _program_cfg())
+    assert plain["oct_16"][0]["sponsor_logo"] == ""
+
+def test_mutating_returned_items_does_not_change_the_cache():
+    sheet = _sheets()["sponsors"]
+    cfg = SheetMapping(**SPONSORS_CFG)
+    mapped = _mapped_sheet(sheet["df"], sheet["hash"], cfg.mapping)
+    _built_items(mapped, sheet["hash"], cfg)[0]["logo"] = "changed"
+    assert _built_items(mapped, sheet["hash"], cfg)[0]["logo"] == "https://cdn/logo-acme.png"
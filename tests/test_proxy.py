@@ -0,0 +1,30 @@
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+import backend.app as app_module
+
+@pytest.fixture
+def proxy(monkeypatch):
+    def make(content, content_type="application/json"):
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, content=content, headers={"content-type": content_type}))
+        with TestClient(app_module.app) as client:
+            # Swap the lifespan's pooled client for the mock, closing it on its own loop.
+            client.portal.call(app_module.app.state.http.aclose)
+            monkeypatch.setattr(app_module.app.state, "http", httpx.AsyncClient(transport=transport))
+            return client.get("/api/program", params={"src": "https://example.com/program.json"})
+    return make
+
+@pytest.mark.parametrize("content, content_type", [
+    (b'{"a": 1, "b": "x"}', "application/json"),
+    (b'\xef\xbb\xbf{"a": 1, "b": "x"}', "application/json"),
+    ('{"a": 1, "b": "x"}'.encode("utf-16"), "application/json; charset=utf-16"),
+])
+def test_proxy_decodes_program_json(proxy, content, content_type):
+    r = proxy(content, content_type)
+    assert r.status_code == 200
+    assert r.json() == {"a": 1, "b": "x"}
+
+def test_proxy_accepts_nan_literals(proxy):
+    r = proxy(b'{"a": NaN}')
+    assert r.status_code == 200
+    assert r.json() == {"a": None}
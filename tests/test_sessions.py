@@ -0,0 +1,163 @@
+import tempfile
+import anyio
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+import backend.app as app_module
+import backend.sessions as sessions
+from backend.processors import sheet_fingerprint
+from backend.sessions import MemorySessionStore, RedisSessionStore, _frame_from_ipc, _frame_to_ipc
+
+CSV = b"Hora,Tema,Ponente\n10:00,Talk A,Ann\n11:00,Talk B,Bob\n"
+
+def _session(df):
+    return {"sheets": {"s": {"df": df, "columns": list(df.columns), "guess": {}, "hash": sheet_fingerprint(df)}}}
+
+def _preview_body(sheet_name):
+    return {"sheets": [{"name": sheet_name, "key": "day1", "slug": "d1", "mapping": {"time": "Hora", "title": "Tema", "speaker": "Ponente"}}]}
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(sessions, "_now", lambda: now[0])
+    return now
+
+@pytest.fixture
+def tmpdir_only(monkeypatch, tmp_path):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    return tmp_path
+
+def test_memory_store_expires_after_ttl(clock):
+    store = MemorySessionStore(ttl=10, max_sessions=4)
+    session = _session(pd.DataFrame({"a": ["1"]}))
+
+    async def run():
+        await store.save("x", session)
+        clock[0] += 5
+        assert await store.load("x") is session
+        clock[0] += 9
+        assert await store.load("x") is session
+        clock[0] += 11
+        assert await store.load("x") is None
+
+    anyio.run(run)
+
+def test_memory_store_drops_least_recently_used(clock):
+    store = MemorySessionStore(ttl=100, max_sessions=2)
+
+    async def run():
+        for sid in ("a", "b"):
+            await store.save(sid, _session(pd.DataFrame({"c": [sid]})))
+            clock[0] += 1
+        assert await store.load("a") is not None
+        await store.save("c", _session(pd.DataFrame({"c": ["c"]})))
+        assert await store.load("b") is None
+        assert await store.load("a") is not None
+        assert await store.load("c") is not None
+
+    anyio.run(run)
+
+def test_ipc_round_trip_keeps_duplicate_and_non_string_columns():
+    df = pd.DataFrame([["1", "x", None], ["2", "y", "z"]], columns=["dup", "dup", 3], index=[5, 7])
+    out = _frame_from_ipc(_frame_to_ipc(df), list(df.columns))
+    assert list(out.columns) == ["dup", "dup", 3]
+    assert list(out.index) == [5, 7]
+    assert out.fillna("").values.tolist() == df.fillna("").values.tolist()
+
+def test_redis_store_round_trip():
+    fakeredis = pytest.importorskip("fakeredis")
+    dropped = []
+    store = RedisSessionStore("redis://localhost", ttl=30, local_cache=0, on_drop=dropped.append)
+    store.redis = fakeredis.FakeAsyncRedis()
+    df = pd.DataFrame([["10:00", "Talk"]], columns=["Hora", 1])
+    session = _session(df)
+
+    async def run():
+        await store.save("x", session)
+        assert 0 < await store.redis.ttl(store._key("x")) <= 30
+        loaded = await store.load("x")
+        assert list(loaded) == ["sheets"]
+        sheet = loaded["sheets"]["s"]
+        assert sheet["hash"] == session["sheets"]["s"]["hash"]
+        assert sheet["columns"] == ["Hora", 1]
+        assert sheet["df"].values.tolist() == df.values.tolist()
+        await store.delete("x")
+        assert dropped == [{sheet["hash"]}]
+        assert await store.load("x") is None
+        assert await store.load("missing") is None
+
+    anyio.run(run)
+
+def test_upload_preview_reset_flow(tmpdir_only):
+    with TestClient(app_module.app) as client:
+        r = client.post("/api/upload", files={"file": ("program.csv", CSV, "text/csv")})
+        assert r.status_code == 200
+        body = r.json()
+        sid = body["session_id"]
+        name = body["sheets"][0]["name"]
+        assert list(tmpdir_only.iterdir()) == []
+
+        r = client.get("/api/sheets", headers={"X-Session": sid})
+        assert [s["name"] for s in r.json()["sheets"]] == [name]
+
+        r = client.post("/api/preview", json=_preview_body(name), headers={"X-Session": sid})
+        assert r.status_code == 200
+        assert [s["title"] for s in r.json()["data"]["day1"]] == ["Talk A", "Talk B"]
+
+        assert client.post("/api/reset", headers={"X-Session": sid}).json() == {"status": "ok"}
+        r = client.post("/api/preview", json=_preview_body(name), headers={"X-Session": sid})
+        assert r.status_code == 400
+
+def test_preview_without_known_session_is_rejected():
+    with TestClient(app_module.app) as client:
+        assert client.post("/api/preview", json=_preview_body("s")).status_code == 400
+        assert client.post("/api/preview", json=_preview_body("s"), headers={"X-Session": "nope"}).status_code == 400
+        assert client.get("/api/sheets", headers={"X-Session": "nope"}).json() == {"sheets": []}
+
+def test_failed_parse_removes_upload(tmpdir_only):
+    with TestClient(app_module.app, raise_server_exceptions=False) as client:
+        r = client.post("/api/upload", files={"file": ("broken.xlsx", b"not a workbook", "application/octet-stream")})
+        assert r.status_code == 500
+    assert list(tmpdir_only.iterdir()) == []
+
+def test_upload_ignores_unknown_session_id(tmpdir_only):
+    with TestClient(app_module.app) as client:
+        r = client.post("/api/upload", files={"file": ("program.csv", CSV, "text/csv")}, headers={"X-Session": "a"})
+        sid = r.json()["session_id"]
+        assert sid != "a"
+        assert client.get("/api/sheets", headers={"X-Session": "a"}).json() == {"sheets": []}
+
+        r = client.post("/api/upload", files={"file": ("program.csv", CSV, "text/csv")}, headers={"X-Session": sid})
+        assert r.json()["session_id"] == sid
+
+def test_memory_store_reports_dropped_sheets(clock):
+    dropped = []
+    store = MemorySessionStore(ttl=10, max_sessions=1, on_drop=dropped.append)
+    first = _session(pd.DataFrame({"a": ["1"]}))
+    second = _session(pd.DataFrame({"a": ["2"]}))
+    first_hash = first["sheets"]["s"]["hash"]
+    second_hash = second["sheets"]["s"]["hash"]
+
+    async def run():
+        await store.save("x", first)
+        await store.save("x", first)
+        assert dropped == []
+        await store.save("x", second)
+        assert dropped == [{first_hash}]
+        await store.save("y", first)
+        assert dropped[-1] == {second_hash}
+        clock[0] += 11
+        assert await store.load("y") is None
+        assert dropped[-1] == {first_hash}
+
+    anyio.run(run)
+
+def test_reset_releases_derived_cache(tmpdir_only):
+    app_module._DERIVED.clear()
+    with TestClient(app_module.app) as client:
+        body = client.post("/api/upload", files={"file": ("program.csv", CSV, "text/csv")}).json()
+        sid, name = body["session_id"], body["sheets"][0]["name"]
+        client.post("/api/preview", json=_preview_body(name), headers={"X-Session": sid})
+        assert app_module._DERIVED
+        client.post("/api/reset", headers={"X-Session": sid})
+        assert not app_module._DERIVED
@@ -1,4 +1,4 @@
-from backend.app import _enrich_sessions_with_sponsor_logos
+from backend.app import _enrich_sessions_with_sponsor_logos, _cached_sponsor_index
 
 def test_enrich_by_id():
     program = { "oct_16": [ {"id":"x-1","title":"Talk A","time":"10:00","sponsor_id":"sp01"}, {"id":"x-2","title":"Talk B","time":"11:00"} ] }
@@ -12,3 +12,10 @@ def test_enrich_by_name():
     other = { "sponsors": [ {"id":"sp01","name":"ACME","logo":"https://cdn/logo-acme.png"}, {"id":"sp02","name":"Globex","logo":"https://cdn/logo-globex.png"} ] }
     _enrich_sessions_with_sponsor_logos(program, other)
     assert program["oct_16"][0]["sponsor_logo"] == "https://cdn/logo-globex.png"
+
+def test_sponsor_index_cached_until_sponsors_change():
+    other = { "sponsors": [ {"id":"sp01","name":"ACME","logo":"https://cdn/logo-acme.png"} ] }
+    first = _cached_sponsor_index(other)
+    assert _cached_sponsor_index({ "sponsors": [dict(other["sponsors"][0])] }) is first
+    other["sponsors"][0]["logo"] = "https://cdn/logo-acme-v2.png"
+    assert _cached_sponsor_index(other)["by_id"]["sp01"] == "https://cdn/logo-acme-v2.png"